@@ -0,0 +1,184 @@
+"""
+Shared helpers for the H2 SQL export converters
+
+convert_h2_to_postgres.py and convert_h2_to_sqlite.py differ mostly in how
+types are mapped, which lines are dropped and how booleans are written. Those
+differences are described by a Dialect; the make_* factories below return
+converters specialized for one dialect, bound once at module load.
+"""
+
+import re
+from collections import namedtuple
+
+
+Dialect = namedtuple('Dialect', [
+    'type_map',          # H2 base type -> target type
+    'sized_types',       # Types whose size specification is carried over
+    'type_prefixes',     # Types also matched as prefixes (e.g. DATETIME -> DATE)
+    'default_type',      # Result for unknown types (None returns the H2 type as-is)
+    'skip_re',           # Lines/statements to drop
+    'skip_first_chars',  # First characters skip_re can match, for a quick reject
+    'skip_comments',     # Drop '--' comment lines without running skip_re
+    'bool_repl',         # Replacement for a TRUE/FALSE match
+])
+
+# H2-specific table clauses
+_H2_CLAUSES_RE = re.compile(r'\s+(?:CACHED|NOT\s+PERSISTENT)\b', re.IGNORECASE)
+_BOOL_RE = re.compile(r'\b(true|false)\b', re.IGNORECASE)
+
+
+# PostgreSQL: keep sizes and TRUE/FALSE, drop H2 session/user statements
+_POSTGRES_TYPE_MAP = {
+    'VARCHAR_IGNORECASE': 'TEXT',
+    'VARCHAR': 'VARCHAR',
+    'CHAR': 'CHAR',
+    'CLOB': 'TEXT',
+    'LONGVARCHAR': 'TEXT',
+    'INTEGER': 'INTEGER',
+    'INT': 'INTEGER',
+    'BIGINT': 'BIGINT',
+    'SMALLINT': 'SMALLINT',
+    'TINYINT': 'SMALLINT',
+    'BOOLEAN': 'BOOLEAN',
+    'BIT': 'BOOLEAN',
+    'DECIMAL': 'DECIMAL',
+    'DOUBLE': 'DOUBLE PRECISION',
+    'FLOAT': 'REAL',
+    'REAL': 'REAL',
+    'TIMESTAMP': 'TIMESTAMP',
+    'DATE': 'DATE',
+    'TIME': 'TIME',
+    'BLOB': 'BYTEA',
+    'BINARY': 'BYTEA',
+}
+
+POSTGRES = Dialect(
+    type_map=_POSTGRES_TYPE_MAP,
+    sized_types=frozenset({'VARCHAR', 'CHAR', 'DECIMAL'}),
+    type_prefixes=(),
+    default_type=None,
+    # SET commands (H2 specific), user/schema creation, grants. Unlike
+    # SQLite, '--' comments are deliberately not dropped: they are kept in
+    # the output, so comment lines may lead a statement and the statement
+    # classifier has to look past them
+    skip_re=re.compile(
+        r'^\s*(?:SET\s|CREATE\s+USER\s|CREATE\s+SCHEMA\s|GRANT\s)',
+        re.IGNORECASE
+    ),
+    skip_first_chars='SsCcGg',
+    skip_comments=False,
+    bool_repl=lambda m: m.group(1).upper(),
+)
+
+
+# SQLite: everything collapses to its storage classes, booleans become 1/0,
+# sequences are dropped entirely
+_SQLITE_TYPE_MAP = {
+    'VARCHAR': 'TEXT',
+    'VARCHAR_IGNORECASE': 'TEXT',
+    'CHAR': 'TEXT',
+    'CLOB': 'TEXT',
+    'LONGVARCHAR': 'TEXT',
+    'INTEGER': 'INTEGER',
+    'INT': 'INTEGER',
+    'BIGINT': 'INTEGER',
+    'SMALLINT': 'INTEGER',
+    'TINYINT': 'INTEGER',
+    'BOOLEAN': 'INTEGER',
+    'BIT': 'INTEGER',
+    'DECIMAL': 'REAL',
+    'DOUBLE': 'REAL',
+    'FLOAT': 'REAL',
+    'REAL': 'REAL',
+    'TIMESTAMP': 'INTEGER',
+    'DATE': 'INTEGER',
+    'TIME': 'INTEGER',
+    'BLOB': 'BLOB',
+    'BINARY': 'BLOB',
+}
+
+SQLITE = Dialect(
+    type_map=_SQLITE_TYPE_MAP,
+    sized_types=frozenset(),
+    # Prefix order matters for the fallback scan
+    type_prefixes=tuple(_SQLITE_TYPE_MAP),
+    default_type='TEXT',
+    # SET commands, sequences, user/schema creation, grants, comments
+    skip_re=re.compile(
+        r'^\s*(?:SET\s|ALTER\s+SEQUENCE\s|CREATE\s+SEQUENCE\s|CREATE\s+USER\s'
+        r'|CREATE\s+SCHEMA\s|GRANT\s|--)',
+        re.IGNORECASE
+    ),
+    skip_first_chars='SsAaCcGg',
+    skip_comments=True,
+    bool_repl=lambda m: '1' if m.group(1)[0] in 'tT' else '0',
+)
+
+
+def make_data_type_converter(dialect):
+    """Return convert_data_type(h2_type) for the given dialect"""
+    lookup = dialect.type_map.get
+    type_map_items = tuple(dialect.type_map.items())
+    sized_types = dialect.sized_types
+    type_prefixes = dialect.type_prefixes
+    default_type = dialect.default_type
+    
+    def convert_data_type(h2_type):
+        """Convert H2 data type to the dialect's equivalent"""
+        # Split off size (e.g., VARCHAR(255) -> 'VARCHAR', '(', '255)')
+        base_type, paren, size = h2_type.upper().partition('(')
+        
+        target_type = lookup(base_type)
+        if target_type is not None:
+            if paren and base_type in sized_types:
+                return target_type + paren + size
+            return target_type
+        
+        # Longer spellings of a known type (e.g. DATETIME, CHARACTER)
+        if base_type.startswith(type_prefixes):
+            for h2, target_type in type_map_items:
+                if base_type.startswith(h2):
+                    return target_type
+        
+        return h2_type if default_type is None else default_type
+    
+    return convert_data_type
+
+
+def make_skip_checker(dialect):
+    """Return should_skip_line(line) for the given dialect"""
+    skip_match = dialect.skip_re.match
+    skip_first_chars = dialect.skip_first_chars
+    skip_comments = dialect.skip_comments
+    
+    def should_skip_line(line):
+        """Check if line should be skipped"""
+        # Comments and lines that can't start a skipped keyword (INSERTs in
+        # particular) are decided without running the regex
+        head = line[:32].lstrip()
+        if head:
+            if skip_comments and head[:2] == '--':
+                return True
+            if head[0] not in skip_first_chars:
+                return False
+        
+        return skip_match(line) is not None
+    
+    return should_skip_line
+
+
+def make_boolean_converter(dialect):
+    """Return convert_booleans(statement) for the given dialect"""
+    bool_sub = _BOOL_RE.sub
+    bool_repl = dialect.bool_repl
+    
+    def convert_booleans(statement):
+        """Rewrite TRUE/FALSE literals in a single pass"""
+        return bool_sub(bool_repl, statement)
+    
+    return convert_booleans
+
+
+def remove_h2_clauses(statement):
+    """Remove H2-specific table clauses (CACHED, NOT PERSISTENT)"""
+    return _H2_CLAUSES_RE.sub('', statement)
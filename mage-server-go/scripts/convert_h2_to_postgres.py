@@ -11,110 +11,93 @@ H2 and PostgreSQL have different SQL dialects. This script converts:
 - Sequences
 """
 
+import mmap
+import os
 import re
+import stat
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
 
+from convert_h2 import (
+    POSTGRES,
+    make_boolean_converter,
+    make_data_type_converter,
+    make_skip_checker,
+    remove_h2_clauses,
+)
 
-def convert_data_type(h2_type):
-    """Convert H2 data type to PostgreSQL equivalent"""
-    h2_type_upper = h2_type.upper()
-    
-    type_map = {
-        'VARCHAR_IGNORECASE': 'TEXT',
-        'VARCHAR': 'VARCHAR',
-        'CHAR': 'CHAR',
-        'CLOB': 'TEXT',
-        'LONGVARCHAR': 'TEXT',
-        'INTEGER': 'INTEGER',
-        'INT': 'INTEGER',
-        'BIGINT': 'BIGINT',
-        'SMALLINT': 'SMALLINT',
-        'TINYINT': 'SMALLINT',
-        'BOOLEAN': 'BOOLEAN',
-        'BIT': 'BOOLEAN',
-        'DECIMAL': 'DECIMAL',
-        'DOUBLE': 'DOUBLE PRECISION',
-        'FLOAT': 'REAL',
-        'REAL': 'REAL',
-        'TIMESTAMP': 'TIMESTAMP',
-        'DATE': 'DATE',
-        'TIME': 'TIME',
-        'BLOB': 'BYTEA',
-        'BINARY': 'BYTEA',
-    }
-    
-    # Check for type with size (e.g., VARCHAR(255))
-    match = re.match(r'(\w+)(\(\d+\))?', h2_type_upper)
-    if match:
-        base_type = match.group(1)
-        size = match.group(2) or ''
-        
-        if base_type in type_map:
-            pg_type = type_map[base_type]
-            # Keep size for VARCHAR, CHAR, DECIMAL
-            if base_type in ['VARCHAR', 'CHAR', 'DECIMAL'] and size:
-                return pg_type + size
-            return pg_type
-    
-    return h2_type  # Return as-is if no mapping found
 
+# Precompiled patterns (compiled once at import, reused for every line/statement)
+# One statement: starts on a non-blank line and runs to the end of the first
+# line containing ';' (same boundaries as the H2 Script export). Bytes pattern,
+# matched directly against the memory-mapped dump
+_STATEMENT_RE = re.compile(rb'^(?=[ \t]*\S)(?:[^;\n]*\n)*?[^;\n]*;[^\n]*', re.MULTILINE)
+_CREATE_TABLE_RE = re.compile(r'CREATE\s+TABLE\s+(\w+)', re.IGNORECASE)
+# Column definitions: "  COLUMNNAME TYPE constraints,"
+_COL_DEF_RE = re.compile(r'(\s+)(\w+)\s+(\w+(?:\(\d+(?:,\s*\d+)?\))?)(.*?)(?=,|\))', re.IGNORECASE)
+_INSERT_RE = re.compile(r'INSERT\s+INTO\s+(\w+)', re.IGNORECASE)
+_ON_RE = re.compile(r'ON\s+(\w+)', re.IGNORECASE)
+_START_WITH_RE = re.compile(r'\bSTART\s+WITH\b', re.IGNORECASE)
+_CREATE_SEQ_RE = re.compile(r'CREATE\s+SEQUENCE\s+(\w+)', re.IGNORECASE)
+_ALTER_SEQ_RE = re.compile(r'ALTER\s+SEQUENCE\s+(\w+)', re.IGNORECASE)
+
+# Statements per batch handed to a worker process
+_CHUNK_SIZE = 5000
 
-def convert_table_name(name):
-    """Convert table name to lowercase (PostgreSQL convention)"""
-    return name.lower()
+# Shared converters specialized for PostgreSQL
+convert_data_type = make_data_type_converter(POSTGRES)
+should_skip_line = make_skip_checker(POSTGRES)
+convert_booleans = make_boolean_converter(POSTGRES)
 
 
-def convert_column_name(name):
-    """Convert column name to lowercase (PostgreSQL convention)"""
-    return name.lower()
+def lowercase_name(statement, match):
+    """Lowercase the name captured by match's first group (PostgreSQL convention)"""
+    start, end = match.span(1)
+    return statement[:start] + statement[start:end].lower() + statement[end:]
 
 
 def convert_create_table(statement):
     """Convert CREATE TABLE statement from H2 to PostgreSQL"""
     # Remove H2-specific clauses
-    statement = re.sub(r'\s+CACHED\b', '', statement, flags=re.IGNORECASE)
-    statement = re.sub(r'\s+NOT\s+PERSISTENT\b', '', statement, flags=re.IGNORECASE)
+    statement = remove_h2_clauses(statement)
     
     # Extract table name and convert to lowercase
-    match = re.search(r'CREATE\s+TABLE\s+(\w+)', statement, re.IGNORECASE)
+    match = _CREATE_TABLE_RE.search(statement)
     if match:
-        old_name = match.group(1)
-        new_name = convert_table_name(old_name)
-        statement = statement.replace(old_name, new_name, 1)
+        statement = lowercase_name(statement, match)
     
-    # Convert column definitions
-    def replace_column_def(match):
-        indent = match.group(1)
-        col_name = convert_column_name(match.group(2))
-        col_type = convert_data_type(match.group(3))
-        rest = match.group(4)
-        return f"{indent}{col_name} {col_type}{rest}"
+    # Convert column definitions, scanning only the column list (the closing
+    # parenthesis is included so the last column's lookahead can see it)
+    start = statement.find('(')
+    if start == -1:
+        return statement
+    end = statement.rfind(')') + 1
     
-    # Match column definitions: "  COLUMNNAME TYPE constraints,"
-    statement = re.sub(
-        r'(\s+)(\w+)\s+(\w+(?:\(\d+(?:,\s*\d+)?\))?)(.*?)(?=,|\))',
-        replace_column_def,
-        statement,
-        flags=re.IGNORECASE
-    )
+    parts = []
+    pos = 0
+    for match in _COL_DEF_RE.finditer(statement, start + 1, end):
+        indent, col_name, col_type, rest = match.groups()
+        parts.append(statement[pos:match.start()])
+        parts.append(f"{indent}{col_name.lower()} {convert_data_type(col_type)}{rest}")
+        pos = match.end()
+    parts.append(statement[pos:])
     
-    return statement
+    return ''.join(parts)
 
 
 def convert_insert(statement):
     """Convert INSERT statement from H2 to PostgreSQL"""
     # Extract table name and convert to lowercase
-    match = re.search(r'INSERT\s+INTO\s+(\w+)', statement, re.IGNORECASE)
+    match = _INSERT_RE.search(statement)
     if match:
-        old_name = match.group(1)
-        new_name = convert_table_name(old_name)
-        statement = statement.replace(f'INSERT INTO {old_name}', f'INSERT INTO {new_name}', 1)
+        statement = lowercase_name(statement, match)
     
     # PostgreSQL uses TRUE/FALSE (keep as-is)
     # Just ensure they're uppercase
-    statement = re.sub(r'\btrue\b', 'TRUE', statement, flags=re.IGNORECASE)
-    statement = re.sub(r'\bfalse\b', 'FALSE', statement, flags=re.IGNORECASE)
+    statement = convert_booleans(statement)
     
     return statement
 
@@ -122,81 +105,188 @@ def convert_insert(statement):
 def convert_create_index(statement):
     """Convert CREATE INDEX statement"""
     # Convert table name to lowercase
-    match = re.search(r'ON\s+(\w+)', statement, re.IGNORECASE)
+    match = _ON_RE.search(statement)
     if match:
-        old_name = match.group(1)
-        new_name = convert_table_name(old_name)
-        statement = re.sub(
-            r'(ON\s+)' + old_name,
-            r'\1' + new_name,
-            statement,
-            flags=re.IGNORECASE
-        )
+        statement = lowercase_name(statement, match)
     
     return statement
 
 
-def should_skip_line(line):
-    """Check if line should be skipped"""
-    skip_patterns = [
-        r'^\s*SET\s+',  # SET commands (H2 specific)
-        r'^\s*CREATE\s+USER\s+',  # User creation
-        r'^\s*CREATE\s+SCHEMA\s+',  # Schema creation (unless PUBLIC)
-        r'^\s*GRANT\s+',  # Grant statements
-    ]
-    
-    for pattern in skip_patterns:
-        if re.match(pattern, line, re.IGNORECASE):
-            return True
-    
-    return False
-
-
 def convert_sequence(statement):
     """Convert sequence statements"""
     # H2: CREATE SEQUENCE ... START WITH X
     # PostgreSQL: CREATE SEQUENCE ... START X
-    statement = re.sub(r'\bSTART\s+WITH\b', 'START', statement, flags=re.IGNORECASE)
+    statement = _START_WITH_RE.sub('START', statement)
     
     # Convert sequence name to lowercase
-    match = re.search(r'CREATE\s+SEQUENCE\s+(\w+)', statement, re.IGNORECASE)
+    match = _CREATE_SEQ_RE.search(statement)
     if match:
-        old_name = match.group(1)
-        new_name = convert_table_name(old_name)
-        statement = statement.replace(old_name, new_name, 1)
+        statement = lowercase_name(statement, match)
     
     return statement
 
 
-def convert_h2_to_postgres(input_file, output_file):
-    """Main conversion function"""
-    print(f"Converting {input_file} to PostgreSQL format...")
+def iter_statements_streamed(f_in):
+    """Yield statements from a binary stream, reading it line by line"""
+    # Same boundaries as _STATEMENT_RE: start on a non-blank line, end with
+    # the first line containing ';'; trailing lines without one are dropped
+    lines = []
+    for line in f_in:
+        if not lines and not line.strip():
+            continue
+        
+        lines.append(line)
+        if b';' in line:
+            stmt = b''.join(lines)
+            lines = []
+            if stmt.endswith(b'\n'):
+                stmt = stmt[:-1]
+            yield stmt.decode('utf-8')
+
+
+def iter_statements(f_in):
+    """Yield statements from an H2 dump opened in binary mode"""
+    st = os.fstat(f_in.fileno())
     
-    with open(input_file, 'r', encoding='utf-8') as f_in:
-        content = f_in.read()
+    # Pipes and FIFOs (e.g. <(zcat dump.sql.gz)) can't be mapped
+    if not stat.S_ISREG(st.st_mode):
+        yield from iter_statements_streamed(f_in)
+        return
     
-    # Split into statements (handle multi-line statements)
-    statements = []
-    current_statement = []
-    in_statement = False
+    # mmap refuses empty files
+    if st.st_size == 0:
+        return
     
-    for line in content.split('\n'):
-        if not line.strip():
-            continue
+    # Map the file instead of reading it: pages are loaded on demand and only
+    # the statement being converted is decoded into a Python string
+    with mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        # Stop at the end of the line holding the last ';'. Trailing lines
+        # without one can't form a statement, and letting the lazy splitter
+        # try them would rescan to EOF from every line start (quadratic)
+        last = content.rfind(b';')
+        if last == -1:
+            return
+        end = content.find(b'\n', last)
+        if end == -1:
+            end = len(content)
+        
+        for match in _STATEMENT_RE.finditer(content, 0, end):
+            yield match.group().decode('utf-8')
+
+
+def split_leading_comments(stmt):
+    """Split a statement into (leading '--' comment lines, remaining SQL)"""
+    # Comments are kept in the output, so a comment line without ';' ends up
+    # in front of the next statement. Blank lines between them are dropped
+    comments = []
+    pos = 0
+    while True:
+        end = stmt.find('\n', pos)
+        if end == -1:
+            break
+        line = stmt[pos:end + 1]
+        stripped = line.lstrip()
+        if stripped and not stripped.startswith('--'):
+            break
+        if stripped:
+            comments.append(line)
+        pos = end + 1
+    
+    return ''.join(comments), stmt[pos:]
+
+
+def convert_statement(stmt):
+    """Convert a single H2 statement, returning (stats key, converted statement)"""
+    # Classify on the leading keywords only; uppercasing the whole statement
+    # would copy every (possibly huge) INSERT. The first character picks the
+    # branch so the INSERT hot path needs a single comparison
+    head = stmt[:32].lstrip()
+    first = head[:1].upper()
+    
+    if first == 'I':
+        if head[:11].upper() == 'INSERT INTO':
+            return 'insert', convert_insert(stmt)
+    elif first == 'C':
+        head = head[:15].upper()
+        if head.startswith('CREATE TABLE'):
+            return 'create_table', convert_create_table(stmt)
+        elif head.startswith('CREATE INDEX'):
+            return 'create_index', convert_create_index(stmt)
+        elif head == 'CREATE SEQUENCE':
+            return 'create_sequence', convert_sequence(stmt)
+    elif first == 'A':
+        if head[:14].upper() == 'ALTER SEQUENCE':
+            # Convert sequence name to lowercase
+            match = _ALTER_SEQ_RE.search(stmt)
+            if match:
+                stmt = lowercase_name(stmt, match)
+            return 'alter_sequence', stmt
+    
+    return 'other', stmt
+
+
+def convert_chunk(statements):
+    """Convert a batch of statements, returning (UTF-8 encoded SQL, per-kind counts)"""
+    converted = []
+    counts = {}
+    
+    # Hot loop: bind globals and methods to locals once per batch
+    skip = should_skip_line
+    convert = convert_statement
+    get_count = counts.get
+    append = converted.append
+    
+    for stmt in statements:
+        # Look past leading comment lines so they don't hide the keyword
+        if stmt[:32].lstrip()[:2] == '--':
+            comments, stmt = split_leading_comments(stmt)
+            append(comments)
         
-        if should_skip_line(line):
+        if skip(stmt):
             continue
         
-        current_statement.append(line)
+        kind, converted_stmt = convert(stmt)
+        counts[kind] = get_count(kind, 0) + 1
+        append(converted_stmt)
+        append('\n')
+    
+    # Encode here so the work happens in the worker process
+    return ''.join(converted).encode('utf-8'), counts
+
+
+def available_cpus():
+    """Number of CPUs this process may run on"""
+    # cpu_count() reports every host core, ignoring affinity masks and
+    # container CPU restrictions
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def convert_chunks(chunks, workers):
+    """Yield convert_chunk() results in input order"""
+    if workers < 2:
+        yield from map(convert_chunk, chunks)
+        return
+    
+    # Statements are independent, so batches are converted in worker
+    # processes. Only a bounded number of batches is in flight to keep
+    # memory use flat
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(convert_chunk, chunk))
+            if len(pending) > 2 * workers:
+                yield pending.popleft().result()
         
-        if ';' in line:
-            # End of statement
-            full_statement = '\n'.join(current_statement)
-            statements.append(full_statement)
-            current_statement = []
+        while pending:
+            yield pending.popleft().result()
+
+
+def convert_h2_to_postgres(input_file, output_file):
+    """Main conversion function"""
+    print(f"Converting {input_file} to PostgreSQL format...")
     
-    # Convert each statement
-    converted = []
     stats = {
         'create_table': 0,
         'insert': 0,
@@ -206,37 +296,15 @@ def convert_h2_to_postgres(input_file, output_file):
         'other': 0,
     }
     
-    for stmt in statements:
-        stmt_upper = stmt.upper()
+    with open(input_file, 'rb') as f_in, \
+            open(output_file, 'wb', buffering=1 << 22) as f_out:
+        statements = iter_statements(f_in)
+        chunks = iter(lambda: list(islice(statements, _CHUNK_SIZE)), [])
         
-        if 'CREATE TABLE' in stmt_upper:
-            converted.append(convert_create_table(stmt))
-            stats['create_table'] += 1
-        elif 'INSERT INTO' in stmt_upper:
-            converted.append(convert_insert(stmt))
-            stats['insert'] += 1
-        elif 'CREATE INDEX' in stmt_upper:
-            converted.append(convert_create_index(stmt))
-            stats['create_index'] += 1
-        elif 'CREATE SEQUENCE' in stmt_upper:
-            converted.append(convert_sequence(stmt))
-            stats['create_sequence'] += 1
-        elif 'ALTER SEQUENCE' in stmt_upper:
-            # Convert sequence name to lowercase
-            match = re.search(r'ALTER\s+SEQUENCE\s+(\w+)', stmt, re.IGNORECASE)
-            if match:
-                old_name = match.group(1)
-                new_name = convert_table_name(old_name)
-                stmt = stmt.replace(old_name, new_name, 1)
-            converted.append(stmt)
-            stats['alter_sequence'] += 1
-        else:
-            converted.append(stmt)
-            stats['other'] += 1
-    
-    # Write converted SQL
-    with open(output_file, 'w', encoding='utf-8') as f_out:
-        f_out.write('\n'.join(converted))
+        for converted, counts in convert_chunks(chunks, available_cpus()):
+            f_out.write(converted)
+            for kind, count in counts.items():
+                stats[kind] += count
     
     print(f"✓ Conversion complete")
     print(f"  CREATE TABLE: {stats['create_table']}")